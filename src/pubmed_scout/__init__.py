@@ -10,8 +10,8 @@ __author__ = "Shruti-lab"
 __description__ = "Fetch PubMed papers with biotech/pharma affiliations and export them to CSV"
 
 from .cli import main, get_papers
-from .fetch import search_pubmed_IDs, fetch_article_details
-from .parse import parse_fetch_response, is_company_affiliation
+from .fetch import search_pubmed_IDs, fetch_article_details, fetch_article_batches
+from .parse import parse_fetch_response, parse_fetch_stream, is_company_affiliation
 from .export_to_csv import article_to_csv
 
 __all__ = [
@@ -19,7 +19,9 @@ __all__ = [
     "get_papers", 
     "search_pubmed_IDs",
     "fetch_article_details",
+    "fetch_article_batches",
     "parse_fetch_response",
+    "parse_fetch_stream",
     "is_company_affiliation",
     "article_to_csv",
 ]
\ No newline at end of file
@@ -1,8 +1,9 @@
 import typer
-from typing import List, Optional
+import itertools
+from typing import List, Optional, Iterable, Iterator, Dict, Any
 from typing_extensions import Annotated
-from .fetch import search_pubmed_IDs, fetch_article_details
-from .parse import parse_fetch_response
+from .fetch import search_pubmed_IDs, fetch_article_batches
+from .parse import parse_fetch_stream
 from .export_to_csv import article_to_csv
 import logging
 from .logger_setup import setup_logging
@@ -11,11 +12,42 @@ logger = logging.getLogger(__name__)
 
 app = typer.Typer()
 
+
+def _echo_articles(articles: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Print each article to the console as it passes through the pipeline.
+    """
+    for article in articles:
+        typer.echo(f"PubmedID: {article['PubmedID']}")
+        typer.echo(f"Title: {article['Title']}")
+        typer.echo(f"Publication Date: {article['Publication Date']}")
+        typer.echo(f"Non-Academic Authors: {article['Non-Academic Authors']}")
+        typer.echo(f"Company Affiliations: {article['Company Affiliations']}")
+        typer.echo(f"Corresponding Author Email: {article['Corresponding Author Email']}")
+        typer.echo("-" * 50)
+        yield article
+
+
+def _parse_responses(responses: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse the Efetch responses one batch at a time, reporting the total once all are parsed.
+    """
+    count = 0
+    for response in responses:
+        for article in parse_fetch_stream(response):
+            count += 1
+            yield article
+
+    logger.info("Successfully parsed %s articles", count)
+    typer.echo(f"Fetched details for {count} articles.")
+
 @app.command()
 def get_papers(query: str,
                retmax: Annotated[int, typer.Option(help="Maximum number of results to return")] = 5,
                filename: Annotated[str, typer.Option( "--filename", "-f", help="Provide filename or default is output.csv")]="",
                debug: Optional[bool] = typer.Option(False, "--debug", "-d", help="Enable debug mode for detailed output"),
+               api_key: Annotated[Optional[str], typer.Option("--api-key", help="NCBI API key, overrides the NCBI_API_KEY environment variable")] = None,
+               cache: Annotated[bool, typer.Option("--cache/--no-cache", help="Reuse article details cached on disk by previous runs")] = True,
                ) -> None:
     """
     Search PubMed with the given query and export results to CSV.
@@ -25,6 +57,8 @@ def get_papers(query: str,
         retmax (int): Maximum number of results to return.
         filename (str): Output CSV filename. Defaults to 'output.csv' if empty.
         debug (bool): Enable debug logging.
+        api_key (Optional[str]): NCBI API key. Defaults to the NCBI_API_KEY environment variable.
+        cache (bool): Read from and store Efetch responses in the on-disk cache.
     Returns:
         None: The function prints results to console or exports to CSV.
 
@@ -37,7 +71,7 @@ def get_papers(query: str,
     # Setup logging based on debug flag
     setup_logging(debug)
 
-    logger.info(f"Starting PubMed Scout with query: '{query}', retmax: {retmax}")
+    logger.info("Starting PubMed Scout with query: '%s', retmax: %s", query, retmax)
     typer.echo(f"Running PubMed Scout with query: {query}")
 
 
@@ -48,42 +82,37 @@ def get_papers(query: str,
     try:
         # Step 1: Search for PMIDs
         logger.debug("Step 1: Searching for PMIDs")
-        search_results = search_pubmed_IDs(query,retmax=retmax)
+        search_results = search_pubmed_IDs(query, retmax=retmax, api_key=api_key)
         
         if not search_results:
             logger.warning("No search results found")
             typer.echo("No results found for the given query.")
             return
         
-        logger.info(f"Found {len(search_results)} PMIDs")
+        logger.info("Found %s PMIDs", len(search_results))
         typer.echo(f"Found {len(search_results)} results for query '{query}'.")
 
         
         # Step 2: Fetch article details
         logger.debug("Step 2: Fetching article details")
         typer.echo("Fetching article details...")
-        root = fetch_article_details(search_results)
+        responses = fetch_article_batches(search_results, api_key=api_key, use_cache=cache)
 
-        # Step 3: Parse response
+        # Step 3: Parse responses. Articles are parsed lazily, one batch at a time.
         logger.debug("Step 3: Parsing article details")
-        articles = parse_fetch_response(root)
+        articles = _parse_responses(responses)
 
-        if not articles:
+        first_article = next(articles, None)
+        if first_article is None:
             logger.warning("No articles parsed from response")
             typer.echo("No articles could be parsed from the response.")
             return
+        articles = itertools.chain([first_article], articles)
 
         # Step 4: Display or export results
         if not filename or filename.strip() == "":
             logger.debug("No filename provided, displaying results to console")
-            for article in articles:
-                typer.echo(f"PubmedID: {article['PubmedID']}")
-                typer.echo(f"Title: {article['Title']}")
-                typer.echo(f"Publication Date: {article['Publication Date']}")
-                typer.echo(f"Non-Academic Authors: {article['Non-Academic Authors']}")
-                typer.echo(f"Company Affiliations: {article['Company Affiliations']}")
-                typer.echo(f"Corresponding Author Email: {article['Corresponding Author Email']}")
-                typer.echo("-" * 50)
+            articles = _echo_articles(articles)
 
         # Step 5: Export to CSV. If no filename is provided it is by default saved to output.csv for ease to extract than just console output.
         logger.debug("Step 5: Exporting to CSV")
@@ -95,7 +124,7 @@ def get_papers(query: str,
         # Re-raise typer exits
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during execution: {e}")
+        logger.error("Unexpected error during execution: %s", e)
         typer.echo(f"An unexpected error occurred: {e}")
         sys.exit(1)
 
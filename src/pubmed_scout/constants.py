@@ -1,7 +1,32 @@
 """Constants for PubMed Scout application."""
 
+import os
+from typing import Optional
+
+# Set at the top of the package __init__, before any submodule is imported
+from . import __version__
+
 BASE_URL: str = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 PUBMED_DATABASE: str = "pubmed"
 
 DEFAULT_OUTPUT_DIR: str = "pubmed_scout_output"
-LOG_FILENAME: str = "pubmed_scout.log"
\ No newline at end of file
+LOG_FILENAME: str = "pubmed_scout.log"
+
+# NCBI E-utilities identification. An API key raises the rate limit from 3 to 10 requests per second.
+API_KEY: Optional[str] = os.getenv("NCBI_API_KEY")
+EMAIL: Optional[str] = os.getenv("NCBI_EMAIL")
+TOOL_NAME: str = "pubmed_scout"
+USER_AGENT: str = f"{TOOL_NAME}/{__version__}"
+
+REQUESTS_PER_SECOND: int = 3
+REQUESTS_PER_SECOND_WITH_API_KEY: int = 10
+
+# Efetch requests are split into batches that are fetched concurrently
+EFETCH_BATCH_SIZE: int = 200
+EFETCH_CONCURRENCY: int = 3
+
+# Efetch responses are cached on disk, keyed by the set of PMIDs requested
+CACHE_DIR: str = os.getenv("PUBMED_SCOUT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pubmed-scout"))
+CACHE_MAX_ENTRIES: int = 256
+# Records change after publication (e.g. Publisher -> MEDLINE, corrections), so entries expire
+CACHE_MAX_AGE: int = 7 * 24 * 60 * 60  # seconds
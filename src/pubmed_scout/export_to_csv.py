@@ -2,67 +2,89 @@ import csv
 import typer
 import logging
 import os
-from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Iterable, Dict, Any, Optional
+from .constants import DEFAULT_OUTPUT_DIR
 
 logger = logging.getLogger(__name__)
 
+# Resolved once at import: src/pubmed_scout/ -> src/ -> project_root/pubmed_scout_output
+_OUTPUT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    DEFAULT_OUTPUT_DIR,
+)
 
-def article_to_csv(articles: List[Dict[str, Any]], filename: Optional[str]) -> None:
+
+def article_to_csv(articles: Iterable[Dict[str, Any]], filename: Optional[str]) -> None:
     """
-    Export a list of articles to a CSV file.
+    Export articles to a CSV file.
+
+    Articles are written as they are consumed, so a generator (e.g. from parse_fetch_stream)
+    is exported without being materialized in memory. Rows go to a temporary file that
+    replaces the output file only once every article has been written, so a fetch or parse
+    failure midway leaves any previous export untouched.
 
     Args:
-        articles (List[Dict[str, Any]]): A list of dictionaries containing article details.
+        articles (Iterable[Dict[str, Any]]): An iterable of dictionaries containing article details.
         filename (Optional[str]): The name of the output CSV file. If empty/None, defaults to 'output.csv'.
     
     Raises:
         SystemExit: If there's an error writing to the file.
     """
-    if not articles:
+    articles = iter(articles)
+    first_article = next(articles, None)
+    if first_article is None:
         logger.info("No articles provided for export")
         typer.echo("No articles to export.")
         return
     
-    # Get the current file's directory (src/pubmed_scout/)
-    current_file_dir = Path(__file__).parent
-    
-    # Go up two levels to reach project root: src/pubmed_scout/ -> src/ -> project_root/
-    project_root = current_file_dir.parent.parent
-
-    output_dir = project_root / "pubmed_scout_output"
-    output_dir.mkdir(exist_ok=True)
+    os.makedirs(_OUTPUT_DIR, exist_ok=True)
 
 
     # Determine output filename 
     output_filename = filename if filename and filename.strip() else "output.csv"
     
 
+    output_path = os.path.join(_OUTPUT_DIR, output_filename)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+
     try:
-        # Create directory if it doesn't exist
-        output_path = output_dir / output_filename
+        logger.debug("Writing articles to %s", output_filename)
 
-        logger.debug(f"Writing {len(articles)} articles to {output_filename}")
+        try:
+            # A 1 MB buffer turns large exports into a few large writes instead of many 8 KB ones
+            with open(tmp_path, mode='w', newline='', encoding='utf-8', buffering=1024 * 1024) as csvfile:
+                # Every article has the same keys, so rows are written as plain tuples
+                # rather than going through DictWriter's per-row dict handling
+                fieldnames = list(first_article.keys())
+                writer = csv.writer(csvfile)
+                writer.writerow(fieldnames)  # Write the header row
+                writer.writerow(tuple(first_article[key] for key in fieldnames))
+                count = 1
+                for article in articles:  # Write the remaining data rows
+                    writer.writerow(tuple(article[key] for key in fieldnames))
+                    count += 1
 
-        with open(output_path, mode='w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = articles[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()  # Write the header row
-            writer.writerows(articles)  # Write the data rows
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
-        logger.info(f"Successfully exported {len(articles)} articles to {output_filename}")
-        typer.echo(f"Exported {len(articles)} articles to {output_filename}.")
+        logger.info("Successfully exported %s articles to %s", count, output_filename)
+        typer.echo(f"Exported {count} articles to {output_filename}.")
     
+    except typer.Exit:
+        # Fetch and parse failures surface here while the articles are consumed
+        raise
     except PermissionError as e:
-        logger.error(f"Permission denied writing to {output_filename}: {e}")
+        logger.error("Permission denied writing to %s: %s", output_filename, e)
         typer.echo(f"Permission denied: Cannot write to {output_filename}")
         raise typer.Exit(1)
     except OSError as e:
-        logger.error(f"OS error writing to {output_filename}: {e}")
+        logger.error("OS error writing to %s: %s", output_filename, e)
         typer.echo(f"Error writing file {output_filename}: {e}")
         raise typer.Exit(1)
     except Exception as e:
-        logger.error(f"Unexpected error during CSV export: {e}")
+        logger.error("Unexpected error during CSV export: %s", e)
         typer.echo(f"Unexpected error during export: {e}")
         raise typer.Exit(1)
 
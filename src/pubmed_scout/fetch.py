@@ -1,23 +1,158 @@
 import requests
 import typer
-from .constants import BASE_URL, PUBMED_DATABASE
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .constants import (
+    BASE_URL, PUBMED_DATABASE, API_KEY, EMAIL, TOOL_NAME, USER_AGENT,
+    REQUESTS_PER_SECOND, REQUESTS_PER_SECOND_WITH_API_KEY,
+    EFETCH_BATCH_SIZE, EFETCH_CONCURRENCY, CACHE_DIR, CACHE_MAX_ENTRIES, CACHE_MAX_AGE,
+)
+from .parse import is_pubmed_article_set
 from typing_extensions import Annotated
-from typing import List, Dict, Optional
-from xml.etree import ElementTree as ET
+from typing import List, Dict, Optional, Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import hashlib
+import itertools
+import os
+import re
+import threading
+import time
 import logging
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover - orjson is a declared dependency
+    from json import loads as _json_loads
+
 logger = logging.getLogger(__name__)
 
 
 
-def search_pubmed_IDs(query: str, retmax: Optional[int] = 5) -> List[str]:
+def _create_session() -> requests.Session:
+    """
+    Create the HTTP session shared by all E-utilities requests.
+
+    Reusing one session keeps TCP/TLS connections alive between Esearch and Efetch calls,
+    transient server errors or throttling responses are retried with backoff, and compressed
+    responses are always requested.
+    """
+    session = requests.Session()
+    # Efetch XML compresses very well; requests decompresses the body transparently
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": USER_AGENT})
+    retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retries))
+    return session
+
+
+_SESSION = _create_session()
+
+_rate_limit_lock = threading.Lock()
+_last_request_time = 0.0
+
+
+def _identification_params(api_key: Optional[str]) -> Dict[str, str]:
+    """
+    Build the tool/email/api_key query parameters NCBI asks E-utilities clients to send.
+    """
+    params = {"tool": TOOL_NAME}
+    if EMAIL:
+        params["email"] = EMAIL
+    if api_key:
+        params["api_key"] = api_key
+    return params
+
+
+_API_KEY_PARAM = re.compile(r"(api_key=)[^&\s]+")
+
+
+def _redact(error: Exception) -> str:
+    """
+    Return the error message with the api_key value removed. requests includes the full
+    request URL, query string and all, in HTTP and connection error messages.
+    """
+    return _API_KEY_PARAM.sub(r"\1***", str(error))
+
+
+def _wait_for_rate_limit(api_key: Optional[str]) -> None:
+    """
+    Block until another E-utilities request may be sent without exceeding NCBI's rate limit
+    (higher when an API key is used). Safe to call from multiple threads.
+    """
+    global _last_request_time
+    requests_per_second = REQUESTS_PER_SECOND_WITH_API_KEY if api_key else REQUESTS_PER_SECOND
+    with _rate_limit_lock:
+        delay = _last_request_time + 1 / requests_per_second - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        _last_request_time = time.monotonic()
+
+
+
+
+def _cache_path(pmids: List[str]) -> str:
+    """
+    Return the cache file for an Efetch request. The key ignores PMID order.
+    """
+    key = hashlib.blake2b(",".join(sorted(pmids)).encode(), digest_size=16).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.xml")
+
+
+def _evict_cache() -> None:
+    """
+    Remove expired cache files and the least recently used ones beyond CACHE_MAX_ENTRIES.
+
+    A file's mtime is the time it was downloaded and its atime the time it was last used.
+    """
+    now = time.time()
+    expired, entries = [], []
+    for entry in os.scandir(CACHE_DIR):
+        if entry.name.endswith(".xml"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another worker thread while scanning
+            if now - stat.st_mtime >= CACHE_MAX_AGE:
+                expired.append(entry.path)
+            else:
+                entries.append((stat.st_atime, entry.path))
+
+    entries.sort()
+    for path in expired + [path for _, path in entries[:-CACHE_MAX_ENTRIES]]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _write_cache(content: bytes, cache_path: str) -> None:
+    """
+    Store an Efetch response in the cache. The file is written under a temporary name
+    first, so readers never see partial XML.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as cache_file:
+            cache_file.write(content)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _evict_cache()
+
+
+def search_pubmed_IDs(query: str, retmax: Optional[int] = 5, api_key: Optional[str] = None) -> List[str]:
     """
     Search PubMed with the given query using Esearch. The function uses the Entrez Esearch API to find IDs (PMIDs)
     matching a query. It supports full PubMed query syntax (Boolean operators, filters, field tags)
 
     Args:
         query (str): The search query string.
-        retmax (int): Maximum number of results to return.
+        retmax (int): Maximum number of results to return, clamped to 1..10000.
+        api_key (Optional[str]): NCBI API key. Defaults to the NCBI_API_KEY environment variable.
 
     Returns:
         List[str]: A list of PubMed IDs (PMIDs).
@@ -35,27 +170,31 @@ def search_pubmed_IDs(query: str, retmax: Optional[int] = 5) -> List[str]:
 
     """
     if not query or not query.strip():
-        logger.error("Empty or invalid query provided", stack_info=True, exc_info=True)
+        logger.error("Empty or invalid query provided")
         typer.echo("[ERROR] Query cannot be empty.")
         raise typer.Exit(1)
+
+    api_key = api_key or API_KEY
     
-    # check if retmax is a positive value. Also put a cap on retmax to avoid excessive requests
-    if retmax and (retmax <= 0 or retmax > 10000):
-        logger.warning(f"Invalid retmax value: {retmax}, using default 5", stack_info=True, exc_info=True)
-        retmax = 5
+    # Clamp retmax to 1..10000 (the Esearch maximum); None or 0 fall back to the default of 5
+    retmax = max(1, min(retmax or 5, 10000))
 
 
-    ESEARCH_URL = f"{BASE_URL}esearch.fcgi?db={PUBMED_DATABASE}&term={query}&retmax={retmax}&retmode=json"
+    ESEARCH_URL = f"{BASE_URL}esearch.fcgi"
+    # Let requests URL-encode the query; PubMed syntax is full of spaces, quotes, brackets and '&'
+    params = {"db": PUBMED_DATABASE, "term": query, "retmax": retmax, "retmode": "json",
+              **_identification_params(api_key)}
     try:
-        logger.debug(f"Making API request to: {ESEARCH_URL}")
-        response = requests.get(ESEARCH_URL, timeout=30)
+        logger.debug("Making API request to: %s with term: %s", ESEARCH_URL, query)
+        _wait_for_rate_limit(api_key)
+        response = _SESSION.get(ESEARCH_URL, params=params, timeout=30)
         response.raise_for_status()
         if response.status_code == 200:
-            data = response.json()
+            data = _json_loads(response.content)
             search_result = data.get("esearchresult", {})
             id_list = search_result.get("idlist", [])
 
-            logger.info(f"Search completed: found {len(id_list)} total results, returning {len(id_list)} IDs")
+            logger.info("Search completed: found %s total results, returning %s IDs", len(id_list), len(id_list))
             typer.echo(f"Search results for query '{query}': {data.get('esearchresult', {}).get('count', 0)} results found.")
 
             return id_list
@@ -64,71 +203,158 @@ def search_pubmed_IDs(query: str, retmax: Optional[int] = 5) -> List[str]:
             raise typer.Exit(1)
         # raise requests.HTTPError(f"Failed to fetch data: {response.status_code} - {response.text}")
     except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {e}")
-        typer.echo(f"Error fetching data: {e}")
+        logger.error("API request failed: %s", _redact(e))
+        typer.echo(f"Error fetching data: {_redact(e)}")
         raise typer.Exit(1)
     except (KeyError, ValueError) as e:
-        logger.error(f"Error parsing API response: {e}")
+        logger.error("Error parsing API response: %s", e)
         typer.echo(f"Error parsing response: {e}")
         raise typer.Exit(1)
 
 
 
-def fetch_article_details(pmid_list: List[str]) -> ET.Element:
+def fetch_article_details(pmid_list: List[str], api_key: Optional[str] = None,
+                          use_cache: bool = True) -> bytes:
     """
     Fetch article details from PubMed using Efetch.
 
+    The raw XML is returned unparsed; parse_fetch_stream / parse_fetch_response parse it
+    incrementally. Responses are cached on disk (see CACHE_DIR), so fetching the same
+    PMIDs again skips the network entirely.
+
     Args:
         pmid_list (List[str]): A list of PubMed IDs (PMIDs) to fetch details for.
+        api_key (Optional[str]): NCBI API key. Defaults to the NCBI_API_KEY environment variable.
+        use_cache (bool): Read from and store responses in the on-disk cache.
 
     Returns:
-        ET.Element: The root element of the XML response containing article details.
+        bytes: The (decompressed) Efetch XML response.
 
     Raises:
         SystemExit: If the request to the PubMed API fails or PMIDs list is empty.
     
     Example:
         >>> fetch_article_details(["12345678", "87654321"])
-        <Element 'PubmedArticleSet' at 0x...>
+        b'<?xml version="1.0" ?>\n<!DOCTYPE PubmedArticleSet ...><PubmedArticleSet>...'
     """
     if not pmid_list or pmid_list == []:
         logger.error("No PMIDs provided for fetching article details")
         typer.echo("No PMIDs provided for fetching article details.")
         raise typer.Exit(1)
     
-    # Validate PMIDs
-    valid_pmids = [pmid for pmid in pmid_list if pmid and pmid.isdigit()]
+    # Validate and de-duplicate PMIDs in one pass, preserving their order. isdigit() also
+    # accepts non-ASCII digits such as "²", which are not valid PMIDs.
+    valid_pmids = list(dict.fromkeys(pmid for pmid in pmid_list if pmid and pmid.isascii() and pmid.isdigit()))
     if not valid_pmids:
         logger.error("No valid PMIDs found in the provided list")
         typer.echo("No valid PMIDs found.")
         raise typer.Exit(1)
     
 
+    api_key = api_key or API_KEY
+
     if len(valid_pmids) != len(pmid_list):
-        logger.warning(f"Filtered {len(pmid_list) - len(valid_pmids)} invalid PMIDs")
+        logger.warning("Filtered %s invalid or duplicate PMIDs", len(pmid_list) - len(valid_pmids))
+
+    cache_path = _cache_path(valid_pmids)
+    if use_cache:
+        try:
+            stat = os.stat(cache_path)
+            if time.time() - stat.st_mtime < CACHE_MAX_AGE:
+                with open(cache_path, "rb") as cache_file:
+                    content = cache_file.read()
+                # Mark as recently used for eviction, keeping the download time for expiry
+                os.utime(cache_path, (time.time(), stat.st_mtime))
+                logger.debug("Using cached article details for %s PMIDs", len(valid_pmids))
+                return content
+            logger.debug("Cached article details expired, fetching again")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not read cached article details, fetching again: %s", e)
+
+    EFETCH_URL = f"{BASE_URL}efetch.fcgi"
+    params = {"db": PUBMED_DATABASE, "id": ",".join(valid_pmids), "retmode": "xml",
+              **_identification_params(api_key)}
 
-    EFETCH_URL = f"{BASE_URL}efetch.fcgi?db={PUBMED_DATABASE}&id={','.join(valid_pmids)}&retmode=xml"
-    
     try:
-        logger.debug(f"Fetching article details for {len(valid_pmids)} PMIDs")
-        response = requests.get(EFETCH_URL, timeout=60)  # Longer timeout for larger requests
+        logger.debug("Fetching article details for %s PMIDs", len(valid_pmids))
+        _wait_for_rate_limit(api_key)
+        response = _SESSION.get(EFETCH_URL, params=params, timeout=60)  # Longer timeout for larger requests
         response.raise_for_status()
 
-        root = ET.fromstring(response.content)
-        logger.info(f"Successfully fetched and parsed article details")
+        content = response.content
+        logger.info("Successfully fetched article details")
         typer.echo(f"Fetching article details for PMIDs: {', '.join(valid_pmids)}")
-        
-        return root
 
     except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch article details: {e}")
-        typer.echo(f"Error fetching article details: {e}")
-        raise typer.Exit(1)
-    except ET.ParseError as e:
-        logger.error(f"Error parsing XML response: {e}")
-        typer.echo(f"Error parsing XML response: {e}")
+        logger.error("Failed to fetch article details: %s", _redact(e))
+        typer.echo(f"Error fetching article details: {_redact(e)}")
         raise typer.Exit(1)
 
+    # Only cache complete article sets, so error pages or truncated bodies are not served again
+    if use_cache and is_pubmed_article_set(content):
+        try:
+            _write_cache(content, cache_path)
+        except OSError as e:
+            logger.warning("Could not write article details to the cache: %s", e)
+    elif use_cache:
+        logger.debug("Not caching Efetch response without a PubmedArticleSet")
+
+    return content
+
+
+
+
+def fetch_article_batches(pmid_list: List[str], batch_size: int = EFETCH_BATCH_SIZE,
+                          concurrency: int = EFETCH_CONCURRENCY,
+                          api_key: Optional[str] = None,
+                          use_cache: bool = True) -> Iterator[bytes]:
+    """
+    Fetch article details for a large list of PMIDs in concurrent Efetch batches.
+
+    The PMIDs are split into batches of batch_size and up to concurrency requests are in flight
+    at once, still subject to the NCBI rate limit. Responses are yielded in PMID order, and a
+    new batch is only requested as an earlier one is handed to the caller, so no more than
+    concurrency batches are fetched ahead of it however slowly it consumes them.
+
+    Args:
+        pmid_list (List[str]): A list of PubMed IDs (PMIDs) to fetch details for.
+        batch_size (int): Maximum number of PMIDs per Efetch request.
+        concurrency (int): Maximum number of concurrent Efetch requests.
+        api_key (Optional[str]): NCBI API key. Defaults to the NCBI_API_KEY environment variable.
+        use_cache (bool): Read from and store responses in the on-disk cache.
+
+    Yields:
+        bytes: One Efetch XML response per batch, as returned by fetch_article_details.
+
+    Raises:
+        SystemExit: If any of the requests fails or the PMIDs list is empty.
+    """
+    # De-duplicate before splitting, so a PMID repeated across batches is fetched only once
+    pmid_list = list(dict.fromkeys(pmid_list))
+
+    if len(pmid_list) <= batch_size:
+        yield fetch_article_details(pmid_list, api_key=api_key, use_cache=use_cache)
+        return
+
+    logger.debug("Fetching %s PMIDs in batches of %s", len(pmid_list), batch_size)
+    batches = (pmid_list[i:i + batch_size] for i in range(0, len(pmid_list), batch_size))
+    fetch = partial(fetch_article_details, api_key=api_key, use_cache=use_cache)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        pending = deque(executor.submit(fetch, batch) for batch in itertools.islice(batches, concurrency))
+        while pending:
+            content = pending.popleft().result()
+            next_batch = next(batches, None)
+            if next_batch is not None:
+                pending.append(executor.submit(fetch, next_batch))
+            yield content
+    finally:
+        # Don't wait for batches the caller will never consume (early stop or a failed batch)
+        executor.shutdown(wait=False, cancel_futures=True)
+
 
 
 
@@ -1,38 +1,55 @@
 import logging
 from pathlib import Path
+from typing import Optional
 import os
 
 
+# The log file is opened once per process and its handler reused by later setup_logging calls
+_FILE_HANDLER: Optional[logging.FileHandler] = None
+
+
 # Configure logging
 def setup_logging(debug: bool = False) -> None:
-    """Setup logging configuration."""
-    # Get the current file's directory (src/pubmed_scout/)
-    current_file_dir = Path(__file__).parent
+    """
+    Setup logging configuration.
+
+    Calling this again (from tests, notebooks or a batch driver) reuses the file handler, so
+    the log file is opened only once. The console handler is created on every call instead,
+    since sys.stderr may have been replaced (e.g. by pytest capture or CliRunner) since then.
+    """
+    global _FILE_HANDLER
+    level = logging.DEBUG if debug else logging.INFO
+    format_string = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-    # Go up two levels to reach project root: src/pubmed_scout/ -> src/ -> project_root/
-    project_root = current_file_dir.parent.parent
+    if _FILE_HANDLER is None:
+        # Get the current file's directory (src/pubmed_scout/)
+        current_file_dir = Path(__file__).parent
 
-    # Create logs directory in project root
-    log_dir = project_root / "logs"
-    log_dir.mkdir(exist_ok=True)
+        # Go up two levels to reach project root: src/pubmed_scout/ -> src/ -> project_root/
+        project_root = current_file_dir.parent.parent
 
+        # Create logs directory in project root
+        log_dir = project_root / "logs"
+        log_dir.mkdir(exist_ok=True)
 
-    log_file = log_dir / "pubmed_scout.log"
 
-    level = logging.DEBUG if debug else logging.INFO
-    format_string = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        log_file = log_dir / "pubmed_scout.log"
+
+        _FILE_HANDLER = logging.FileHandler(log_file)
 
-    # Clear any existing handlers to avoid duplicates
-    logging.getLogger().handlers.clear()
+    root_logger = logging.getLogger()
+
+    # Clear any existing handlers to avoid duplicates; the shared file handler is not closed
+    root_logger.handlers.clear()
 
     logging.basicConfig(
         level=level,
         format=format_string,
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(log_file)
-        ]
+        handlers=[logging.StreamHandler(), _FILE_HANDLER]
     )
 
+    # urllib3 logs each request line at DEBUG, which includes the NCBI api_key query parameter
+    logging.getLogger("urllib3").setLevel(logging.INFO)
+
     if debug:
-        logging.getLogger().info(f"Debug logging enabled. Log file: {log_file}")
\ No newline at end of file
+        root_logger.info("Debug logging enabled. Log file: %s", _FILE_HANDLER.baseFilename)
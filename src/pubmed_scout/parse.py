@@ -1,9 +1,17 @@
 import typer
 import logging
-from typing import List, Dict, Any, Set, Optional
-from xml.etree import ElementTree as ET
+from typing import List, Dict, Any, Set, Optional, Iterator, IO, Union
+from io import BytesIO
+from functools import lru_cache
 import re
 
+try:
+    from lxml import etree as ET
+    _HAS_LXML = True
+except ImportError:  # pragma: no cover - lxml is a declared dependency
+    from xml.etree import ElementTree as ET
+    _HAS_LXML = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,13 +28,77 @@ COMPANY_KEYWORDS = [
     "inc", "ltd", "llc", "gmbh", "corp", "corporation", "biotech", "pharma", "therapeutics"
 ]
 
+def _keyword_regex(keywords: List[str]) -> "re.Pattern[str]":
+    """
+    Compile keywords into a single case-insensitive alternation matched in one pass over the text.
+
+    A keyword containing another keyword (e.g. "corporation" and "corp") can never change the
+    result of a substring search, so only the minimal set is compiled.
+    """
+    lowered = {keyword.lower() for keyword in keywords}
+    minimal = sorted(keyword for keyword in lowered
+                     if not any(other != keyword and other in keyword for other in lowered))
+    return re.compile("|".join(map(re.escape, minimal)), re.IGNORECASE)
+
+
+_COMPANY_RE = _keyword_regex(COMPANY_KEYWORDS)
+_ACADEMIC_RE = _keyword_regex(ACADEMIC_KEYWORDS)
+
+# Parts are bounded by the RFC 5321 length limits so long runs of dots and letters
+# in affiliation text can't make the engine scan unboundedly at every position.
+# The lookbehind makes an over-long local part fail to match instead of matching its tail.
 EMAIL_PATTERN = re.compile(
-    r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+    r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]{1,64}@[a-zA-Z0-9.-]{1,255}\.[a-zA-Z]{2,24}',
+    re.ASCII
 )
 
+
+# XML declaration, comments and DOCTYPE, followed by the PubmedArticleSet root element
+_ARTICLE_SET_START = re.compile(
+    rb'\s*(?:<\?.*?\?>\s*|<!--.*?-->\s*|<!DOCTYPE[^>]*>\s*)*<PubmedArticleSet[\s>]',
+    re.DOTALL
+)
+
+
+def _compile_path(path: str):
+    """
+    Compile an XPath expression once so it can be reused for every article.
+
+    Expressions ending in /text() return the direct text nodes of the matching elements,
+    others return elements. Without lxml an equivalent ElementPath lookup is returned instead.
+    """
+    if _HAS_LXML:
+        return ET.XPath(path)
+    if path.endswith("/text()"):  # pragma: no cover - lxml is a declared dependency
+        element_path = path[:-len("/text()")]
+        return lambda element: [text for e in element.iterfind(element_path)
+                                for text in (e.text, *(child.tail for child in e)) if text]
+    return lambda element: element.findall(path)  # pragma: no cover
+
+
+def _element_text(element: ET.Element) -> str:
+    """
+    Return all text of an element, including text inside inline markup such as <i> or <sup>.
+    """
+    return "".join(element.itertext()).strip()
+
+
+# Direct child paths following the PubmedArticle DTD, so no lookup scans the whole article subtree.
+# Titles and affiliations may contain inline markup, so those return elements read with _element_text.
+_PMID = _compile_path("./MedlineCitation/PMID/text()")
+_TITLE = _compile_path("./MedlineCitation/Article/ArticleTitle")
+_PUBDATE = _compile_path("./MedlineCitation/Article/Journal/JournalIssue/PubDate")
+_AUTHORS = _compile_path("./MedlineCitation/Article/AuthorList/Author")
+_AFFILIATIONS = _compile_path("./AffiliationInfo/Affiliation")
+
+
+@lru_cache(maxsize=65536)
 def is_company_affiliation(affiliation: str) -> bool:
     """
     Check if an affiliation text contains company-related keywords.
+
+    Results are memoized, since the same affiliation string usually repeats across
+    co-authors and across articles from the same institution.
     
     Args:
         affiliation (str): The affiliation text to check.
@@ -37,27 +109,28 @@ def is_company_affiliation(affiliation: str) -> bool:
     if not affiliation:
         return False
 
-    return any(keyword in affiliation.lower() for keyword in COMPANY_KEYWORDS) and not any(keyword in affiliation.lower() for keyword in ACADEMIC_KEYWORDS)
+    return _COMPANY_RE.search(affiliation) is not None and _ACADEMIC_RE.search(affiliation) is None
 
 
 def parse_publication_date(pub_date_element: Optional[ET.Element]) -> str:
     """
     Parse publication date from XML element.
+
+    The children are joined in document order, which the PubMed DTD fixes as
+    Year, Month, Day (or Season), so free-text MedlineDate values are kept as well.
     
     Args:
         pub_date_element (Optional[ET.Element]): The publication date XML element.
     
     Returns:
-        str: Formatted publication date string.
+        str: Formatted publication date string, e.g. "2025 Jul 30" or "2024 Jul-Aug".
     """
     if pub_date_element is None:
         return "No publication date available"
-    
-    year = pub_date_element.findtext('Year', '').strip()
-    month = pub_date_element.findtext('Month', '').strip()
-    day = pub_date_element.findtext('Day', '').strip()
-    
-    date_parts = [part for part in [year, month, day] if part]
+
+    # Skip comments/processing instructions, whose tag is not a string under lxml
+    date_parts = [text for text in ((child.text or '').strip() for child in pub_date_element
+                                    if isinstance(child.tag, str)) if text]
     return ' '.join(date_parts) if date_parts else "No publication date available"
 
 
@@ -70,114 +143,190 @@ def extract_emails_from_text(text: str) -> List[str]:
         text (str): The text to search for email addresses.
     
     Returns:
-        List[str]: A list of unique email addresses found in the text.
+        List[str]: A list of email addresses found in the text, in order of appearance.
+        Duplicates are not removed; callers collecting emails into a set dedupe them there.
     """
     if not text:
         return []
 
-    emails = EMAIL_PATTERN.findall(text)
-    return list(set(emails))  # Remove duplicates
+    return EMAIL_PATTERN.findall(text)
 
 
 
-def parse_fetch_response(root: ET.Element) -> List[Dict[str, Any]]:
+def _parse_article(article: ET.Element) -> Optional[Dict[str, Any]]:
     """
-    Parse the response from the fetch function to extract relevant information.
+    Extract the exported fields from a single PubmedArticle element.
 
     Args:
-        root (ET.Element): The root element of the XML response from the fetch request.
+        article (ET.Element): A PubmedArticle XML element.
 
     Returns:
-        List[Dict[str, Any]]: A list of dictionaries containing parsed article data.
-    
+        Optional[Dict[str, Any]]: The parsed article data, or None if the article has no PMID.
+    """
+    pmids = _PMID(article)
+    if not pmids:
+        logger.warning("Article found without PMID, skipping")
+        return None
+
+    pmid = pmids[0]
+
+    # Extract article information
+    titles = _TITLE(article)
+    title = (_element_text(titles[0]) if titles else "") or "No title available"
+    pub_dates = _PUBDATE(article)
+    pub_date_str = parse_publication_date(pub_dates[0] if pub_dates else None)
+
+    # Process authors and affiliations
+    non_academic_authors: Set[str] = set()
+    company_affiliations: Set[str] = set()
+    author_emails: Set[str] = set()
+
+    for author in _AUTHORS(article):
+        first_name = author.findtext("ForeName", "").strip()
+        last_name = author.findtext("LastName", "").strip()
+        # Skip authors without last name in case
+        if not last_name:
+            continue
+
+        name = f"{first_name} {last_name}".strip()
+
+        for affiliation in _AFFILIATIONS(author):
+            # Stripped once; the keyword and email regexes are case-insensitive, so no lowered copy is needed
+            aff_text = _element_text(affiliation)
+            if is_company_affiliation(aff_text):
+                non_academic_authors.add(name)
+                company_affiliations.add(aff_text)
+
+                # Extract emails from affiliation text
+                author_emails.update(extract_emails_from_text(aff_text))
+
+    logger.debug("Successfully parsed article PMID: %s", pmid)
+
+    return {
+        "PubmedID":pmid,
+        "Title": title,
+        "Publication Date": pub_date_str,
+        "Non-Academic Authors": "; ".join(non_academic_authors),
+        "Company Affiliations": "; ".join(company_affiliations),
+        "Corresponding Author Email": "; ".join((author_emails)) if author_emails else "NO-EMAIL"
+    }
+
+
+
+def _iter_pubmed_articles(source: IO[bytes]) -> Iterator[ET.Element]:
+    """
+    Incrementally yield PubmedArticle elements from an XML stream.
+
+    Each article is cleared once the consumer moves on, and already processed
+    siblings are detached from the root, so only one article is held in memory.
+    """
+    if _HAS_LXML:
+        for _, elem in ET.iterparse(source, events=("end",), tag="PubmedArticle"):
+            yield elem
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+    else:  # pragma: no cover - lxml is a declared dependency
+        for _, elem in ET.iterparse(source, events=("end",)):
+            if elem.tag == "PubmedArticle":
+                yield elem
+                elem.clear()
+
+
+
+def is_pubmed_article_set(content: bytes) -> bool:
+    """
+    Check that an Efetch response looks like a complete PubmedArticleSet with at least one article.
+
+    NCBI error documents (e.g. <eFetchResult><ERROR>...), empty sets and truncated XML all
+    return False. Only the prolog, the closing tag and the presence of an article are checked,
+    so the response is not parsed a second time.
+
+    Args:
+        content (bytes): The Efetch XML response.
+
+    Returns:
+        bool: True if the response is a complete article set with articles, False otherwise.
+    """
+    return (_ARTICLE_SET_START.match(content) is not None
+            and content[-64:].rstrip().endswith(b"</PubmedArticleSet>")
+            and b"<PubmedArticle>" in content)
+
+
+
+def parse_fetch_stream(source: Union[bytes, IO[bytes]]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream-parse an Efetch XML response, yielding one article at a time.
+
+    Args:
+        source (Union[bytes, IO[bytes]]): The Efetch XML, as bytes or a binary file-like object.
+
+    Yields:
+        Dict[str, Any]: Parsed article data, in the same format as parse_fetch_response.
+
     Raises:
-        SystemExit: If root is None or parsing fails.
+        SystemExit: If source is None, is neither bytes nor a binary file-like object,
+            or cannot be read or parsed.
     """
-    if root is None:
-        logger.error("No data to parse - root element is None")
+    if source is None:
+        logger.error("No data to parse - source stream is None")
         typer.echo("No data to parse from the fetch response.")
         raise typer.Exit(1)
 
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    elif not hasattr(source, "read"):
+        # iterparse would treat e.g. a str as a file name
+        logger.error("Cannot parse source of type %s", type(source).__name__)
+        typer.echo(f"Error parsing fetch response: unsupported source type {type(source).__name__}")
+        raise typer.Exit(1)
 
-    articles: List[Dict[str, Any]] = []
-    
+    count = 0
     try:
-        article_elements = root.findall(".//PubmedArticle")
-        logger.debug(f"Found {len(article_elements)} articles to parse")
-        
-        for article in article_elements:
+        for article in _iter_pubmed_articles(source):
             try:
-                pmid_element = article.find(".//PMID")
-                if pmid_element is None:
-                    logger.warning("Article found without PMID, skipping")
-                    continue
-
-                pmid = pmid_element.text
-                if not pmid:
-                    logger.warning("Empty PMID found, skipping article")
-                    continue
-
-
-                # Extract article information
-                title = article.find(".//ArticleTitle").text if article.find(".//ArticleTitle") is not None else "No title available"
-                pub_date = article.find(".//PubDate")
-                pub_date_str = parse_publication_date(pub_date)
-
-                # Process authors and affiliations
-                non_academic_authors: Set[str] = set()
-                company_affiliations: Set[str] = set()
-                author_emails: Set[str] = set()
-
-                for author in article.findall(".//AuthorList/Author"):
-                    first_name = author.findtext("ForeName", "").strip()
-                    last_name = author.findtext("LastName", "").strip()
-                    # Skip authors without last name in case
-                    if not last_name:  
-                            continue
-                        
-                    name = f"{first_name} {last_name}".strip()
-
-                    for aff_info in author.findall(".//AffiliationInfo"):
-                        aff_element = aff_info.find(".//Affiliation")
-                        if aff_element is None:
-                            continue
-                            
-                        aff_text = aff_element.text
-                        if not aff_text:
-                            continue
-                            
-                        if is_company_affiliation(aff_text):
-                            non_academic_authors.add(name)
-                            company_affiliations.add(aff_text.strip())
-                                
-                            # Extract emails from affiliation text
-                            emails = extract_emails_from_text(aff_text)
-                            author_emails.update(emails)
-
-                articles.append({
-                    "PubmedID":pmid,
-                    "Title": title,
-                    "Publication Date": pub_date_str,
-                    "Non-Academic Authors": "; ".join(non_academic_authors),
-                    "Company Affiliations": "; ".join(company_affiliations),
-                    "Corresponding Author Email": "; ".join((author_emails)) if author_emails else "NO-EMAIL"
-                })
-
-                logger.debug(f"Successfully parsed article PMID: {pmid}")
-
+                parsed = _parse_article(article)
             except Exception as e:
-                logger.warning(f"Error parsing individual article: {e}")
+                logger.warning("Error parsing individual article: %s", e)
                 continue
 
-        logger.info(f"Successfully parsed {len(articles)} articles")
-        typer.echo(f"Fetched details for {len(articles)} articles.")
+            if parsed is not None:
+                count += 1
+                yield parsed
 
-        return articles
-        
-    except Exception as e:
-        logger.error(f"Critical error during parsing: {e}")
+    except ET.ParseError as e:
+        logger.error("Error parsing XML response: %s", e)
+        typer.echo(f"Error parsing XML response: {e}")
+        raise typer.Exit(1)
+    except (OSError, TypeError) as e:
+        logger.error("Critical error during parsing: %s", e)
         typer.echo(f"Error parsing fetch response: {e}")
         raise typer.Exit(1)
-  
 
+    # Callers parsing several batches report the overall total themselves
+    logger.debug("Parsed %s articles from response", count)
+
+
+
+def parse_fetch_response(source: Union[bytes, IO[bytes]]) -> List[Dict[str, Any]]:
+    """
+    Parse the response from the fetch function to extract relevant information.
+
+    The XML is parsed incrementally with iterparse, so only one article element is kept
+    in memory at a time; use parse_fetch_stream directly to avoid building the list.
+
+    Args:
+        source (Union[bytes, IO[bytes]]): The Efetch XML, as bytes or a binary file-like object.
+
+    Returns:
+        List[Dict[str, Any]]: A list of dictionaries containing parsed article data.
+    
+    Raises:
+        SystemExit: If source is None or parsing fails.
+    """
+    articles = list(parse_fetch_stream(source))
+
+    logger.info("Successfully parsed %s articles", len(articles))
+    typer.echo(f"Fetched details for {len(articles)} articles.")
 
+    return articles
@@ -0,0 +1,142 @@
+import json
+import pytest
+import requests
+from unittest.mock import Mock
+
+
+SAMPLE_PUBMED_XML = """\
+<PubmedArticleSet>
+    <PubmedArticle>
+        <MedlineCitation Status="Publisher" Owner="NLM">
+        <PMID Version="1">12345</PMID>
+        <DateRevised>
+            <Year>2025</Year>
+            <Month>07</Month>
+            <Day>31</Day>
+        </DateRevised>
+        <Article PubModel="Print">
+            <Journal>
+            <ISSN IssnType="Print">1234-5678</ISSN>
+            <JournalIssue CitedMedium="Print">
+                <Volume>10</Volume>
+                <Issue>3</Issue>
+                <PubDate>
+                <Year>2025</Year>
+                <Month>Jul</Month>
+                <Day>30</Day>
+                </PubDate>
+            </JournalIssue>
+            <Title>Journal of Sample Research</Title>
+            <ISOAbbreviation>J Sample Res</ISOAbbreviation>
+            </Journal>
+            <ArticleTitle>Sample Study on BioTech Innovations</ArticleTitle>
+            <Abstract>
+            <AbstractText Label="BACKGROUND" NlmCategory="BACKGROUND">
+                This is a sample abstract for demonstrating PubMed EFetch XML output.
+            </AbstractText>
+            </Abstract>
+            <AuthorList CompleteYN="Y">
+            <Author ValidYN="Y">
+                <LastName>Doe</LastName>
+                <ForeName>John</ForeName>
+                <Initials>J</Initials>
+                <AffiliationInfo>
+                <Affiliation>BioTech Corp, San Francisco, CA, USA. john@biotech.com.</Affiliation>
+                </AffiliationInfo>
+            </Author>
+            </AuthorList>
+            <Language>eng</Language>
+            <PublicationTypeList>
+            <PublicationType UI="D016428">Journal Article</PublicationType>
+            </PublicationTypeList>
+        </Article>
+        <MedlineJournalInfo>
+            <Country>United States</Country>
+            <MedlineTA>J Sample Res</MedlineTA>
+            <NlmUniqueID>1234567</NlmUniqueID>
+            <ISSNLinking>1234-5678</ISSNLinking>
+        </MedlineJournalInfo>
+        </MedlineCitation>
+        <PubmedData>
+        <History>
+            <PubMedPubDate PubStatus="received">
+            <Year>2025</Year>
+            <Month>05</Month>
+            <Day>01</Day>
+            </PubMedPubDate>
+            <PubMedPubDate PubStatus="accepted">
+            <Year>2025</Year>
+            <Month>07</Month>
+            <Day>15</Day>
+            </PubMedPubDate>
+            <PubMedPubDate PubStatus="entrez">
+            <Year>2025</Year>
+            <Month>07</Month>
+            <Day>31</Day>
+            </PubMedPubDate>
+        </History>
+        <PublicationStatus>ppublish</PublicationStatus>
+        <ArticleIdList>
+            <ArticleId IdType="pubmed">12345</ArticleId>
+            <ArticleId IdType="doi">10.1234/sample.2025.00123</ArticleId>
+        </ArticleIdList>
+        </PubmedData>
+    </PubmedArticle>
+</PubmedArticleSet>
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Point the Efetch disk cache at a per-test directory."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr("pubmed_scout.fetch.CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture(scope="session")
+def sample_pubmed_xml():
+    """A one-article Efetch response, encoded once and shared by every test that needs it."""
+    return SAMPLE_PUBMED_XML.encode()
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    """Skip the NCBI request throttle; the HTTP session is mocked in tests."""
+    monkeypatch.setattr("pubmed_scout.fetch._wait_for_rate_limit", lambda api_key: None)
+
+
+@pytest.fixture
+def esearch_response():
+    """Build a successful Esearch response returning the given PMIDs."""
+    def make(id_list):
+        response = Mock()
+        response.status_code = 200
+        response.content = json.dumps({
+            "esearchresult": {"idlist": id_list, "count": str(len(id_list))}
+        }).encode()
+        return response
+    return make
+
+
+@pytest.fixture
+def efetch_response():
+    """Build a successful Efetch response with the given XML body."""
+    def make(body):
+        response = Mock()
+        response.status_code = 200
+        response.content = body
+        return response
+    return make
+
+
+@pytest.fixture
+def error_response():
+    """Build a response whose raise_for_status fails with the given status."""
+    def make(status_code, text):
+        response = Mock()
+        response.status_code = status_code
+        response.text = text
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status_code} {text}")
+        return response
+    return make
@@ -0,0 +1,50 @@
+from unittest.mock import patch
+from typer.testing import CliRunner
+from pubmed_scout.cli import app
+
+
+runner = CliRunner()
+
+
+def _efetch_body(pmid):
+    return f"""
+    <PubmedArticleSet>
+        <PubmedArticle>
+            <MedlineCitation>
+                <PMID>{pmid}</PMID>
+                <Article><ArticleTitle>Article {pmid}</ArticleTitle></Article>
+            </MedlineCitation>
+        </PubmedArticle>
+    </PubmedArticleSet>
+    """.encode()
+
+
+class TestGetPapers:
+    """Test cases for the get-papers-list command."""
+
+    @patch('pubmed_scout.cli.fetch_article_batches')
+    @patch('pubmed_scout.cli.search_pubmed_IDs')
+    def test_summary_counts_all_batches(self, mock_search, mock_batches, tmp_path, monkeypatch):
+        """Test the parse summary is reported once, with the total over every batch."""
+        monkeypatch.setattr("pubmed_scout.export_to_csv._OUTPUT_DIR", str(tmp_path))
+        mock_search.return_value = ["1", "2", "3"]
+        mock_batches.return_value = iter([_efetch_body(pmid) for pmid in ("1", "2", "3")])
+
+        result = runner.invoke(app, ["cancer", "--filename", "out.csv"])
+
+        assert result.exit_code == 0
+        assert result.output.count("Fetched details for") == 1
+        assert "Fetched details for 3 articles." in result.output
+        assert "Exported 3 articles to out.csv." in result.output
+
+    @patch('pubmed_scout.cli.search_pubmed_IDs')
+    def test_repeated_invocations_log_to_current_stderr(self, mock_search):
+        """Test a second invocation does not log to the first invocation's closed stderr."""
+        mock_search.return_value = []
+
+        for _ in range(2):
+            result = runner.invoke(app, ["cancer"])
+
+            assert result.exit_code == 0
+            assert "Logging error" not in result.output
+            assert "Starting PubMed Scout" in result.output
@@ -3,6 +3,7 @@ import csv
 import os
 from tempfile import NamedTemporaryFile
 from unittest.mock import patch
+import typer
 from pubmed_scout.export_to_csv import article_to_csv
 
 
@@ -79,4 +80,23 @@ class TestArticleToCSV:
         """Test export with empty articles list."""
         article_to_csv([], "test.csv")
         
-        mock_echo.assert_called_with("No articles to export.")
\ No newline at end of file
+        mock_echo.assert_called_with("No articles to export.")
+
+    def test_export_failure_keeps_previous_file(self, tmp_path):
+        """Test a fetch/parse failure midway re-raises its exit and keeps the old export."""
+        filename = str(tmp_path / "existing.csv")
+        with open(filename, 'w', encoding='utf-8') as csvfile:
+            csvfile.write("previous export\n")
+
+        def failing_articles():
+            yield {"PubmedID": "12345", "Title": "Test Article 1"}
+            raise typer.Exit(1)
+
+        with patch('pubmed_scout.export_to_csv.typer.echo') as mock_echo:
+            with pytest.raises(typer.Exit):
+                article_to_csv(failing_articles(), filename)
+
+        with open(filename, 'r', encoding='utf-8') as csvfile:
+            assert csvfile.read() == "previous export\n"
+        assert os.listdir(tmp_path) == ["existing.csv"]
+        assert not any("Unexpected error" in str(call) for call in mock_echo.call_args_list)
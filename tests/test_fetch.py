@@ -1,63 +1,88 @@
+import importlib
+import os
+import time
 import pytest
 import requests
-from unittest.mock import patch, Mock
-from xml.etree import ElementTree as ET
-from pubmed_scout.fetch import search_pubmed_IDs, fetch_article_details
+from unittest.mock import Mock, patch
+import pubmed_scout
+from pubmed_scout import constants
+from pubmed_scout.constants import BASE_URL, CACHE_MAX_AGE
+from pubmed_scout.fetch import _SESSION, search_pubmed_IDs, fetch_article_details, fetch_article_batches
+# Imported before the autouse no_rate_limit fixture replaces it on the module
+from pubmed_scout.fetch import _wait_for_rate_limit
 import typer
 
 class TestSearchPubmedIDs:
     """Test cases for search_pubmed_IDs function."""
     
-    @patch('pubmed_scout.fetch.requests.get')
-    def test_search_success(self, mock_get):
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_search_success(self, mock_get, esearch_response):
         """Test successful search returns correct PMIDs."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "esearchresult": {
-                "idlist": ["40741195","40741182"],
-                "count": "2"
-            }
-        }
-        mock_get.return_value = mock_response
+        mock_get.return_value = esearch_response(["40741195", "40741182"])
         
         result = search_pubmed_IDs("cancer", retmax=5)
 
         assert result == ["40741195", "40741182"]
         mock_get.assert_called_once()
+        params = mock_get.call_args.kwargs["params"]
+        assert params["term"] == "cancer"
+        assert params["tool"] == "pubmed_scout"
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_search_with_api_key(self, mock_get, esearch_response):
+        """Test the API key is sent with the request."""
+        mock_get.return_value = esearch_response([])
+
+        search_pubmed_IDs("cancer", api_key="secret")
+
+        assert mock_get.call_args.kwargs["params"]["api_key"] == "secret"
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_search_error_does_not_leak_api_key(self, mock_get, error_response, capsys, caplog):
+        """Test the API key in the failed request URL is not logged or printed."""
+        response = error_response(500, "Server Error")
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            "500 Server Error: Internal Server Error for url: "
+            f"{BASE_URL}esearch.fcgi?term=x&tool=pubmed_scout&api_key=SECRETKEY"
+        )
+        mock_get.return_value = response
+
+        with pytest.raises(typer.Exit):
+            search_pubmed_IDs("x", api_key="SECRETKEY")
+
+        output = capsys.readouterr().out + caplog.text
+        assert "500 Server Error" in output
+        assert "SECRETKEY" not in output
     
-    @patch('pubmed_scout.fetch.requests.get')
-    def test_search_empty_results(self, mock_get):
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_search_empty_results(self, mock_get, esearch_response):
         """Test search with no results."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "esearchresult": {
-                "idlist": [],
-                "count": "0"
-            }
-        }
-        mock_get.return_value = mock_response
+        mock_get.return_value = esearch_response([])
         
         result = search_pubmed_IDs("nonexistent_query")
         
         assert result == []
     
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_search_clamps_retmax(self, mock_get, esearch_response):
+        """Test out-of-range retmax values are clamped to the Esearch limits."""
+        mock_get.return_value = esearch_response([])
+
+        for retmax, expected in [(20000, 10000), (-3, 1), (None, 5), (0, 5)]:
+            search_pubmed_IDs("cancer", retmax=retmax)
+            assert mock_get.call_args.kwargs["params"]["retmax"] == expected
+
     def test_search_empty_query(self):
         """Test search with empty query raises Exit."""
         with pytest.raises(SystemExit) as e:  # typer.Exit raises SystemExit
             search_pubmed_IDs("")
         assert e.value.code == 1
     
-    @patch('pubmed_scout.fetch.requests.get')
+    @patch('pubmed_scout.fetch._SESSION.get')
     @patch('pubmed_scout.fetch.typer.Exit')
-    def test_search_api_failure(self, mock_exit, mock_get):
+    def test_search_api_failure(self, mock_exit, mock_get, error_response):
         """Test API failure handling."""
-        mock_response = Mock()
-        mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
-        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("500 Server Error")
-        mock_get.return_value = mock_response
+        mock_get.return_value = error_response(500, "Internal Server Error")
 
         with pytest.raises(typer.Exit) as e:
             search_pubmed_IDs("cancer")
@@ -69,18 +94,76 @@ class TestSearchPubmedIDs:
 class TestFetchArticleDetails:
     """Test cases for fetch_article_details function."""
     
-    @patch('pubmed_scout.fetch.requests.get')
-    def test_fetch_success(self, mock_get):
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_success(self, mock_get, efetch_response, sample_pubmed_xml):
         """Test successful article fetch."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.content = b'<PubmedArticleSet><PubmedArticle></PubmedArticle></PubmedArticleSet>'
-        mock_get.return_value = mock_response
+        mock_get.return_value = efetch_response(sample_pubmed_xml)
         
         result = fetch_article_details(["40741182"])
         
-        assert isinstance(result, ET.Element)
-        assert result.tag == "PubmedArticleSet"
+        assert isinstance(result, (bytes, bytearray))
+        assert b"PubmedArticleSet" in result
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_uses_cache(self, mock_get, efetch_response, sample_pubmed_xml):
+        """Test a repeated fetch of the same PMIDs is served from the disk cache."""
+        mock_get.return_value = efetch_response(sample_pubmed_xml)
+
+        fetch_article_details(["2", "1"])
+        result = fetch_article_details(["1", "2"])
+
+        assert result == sample_pubmed_xml
+
+        mock_get.assert_called_once()
+
+        mock_get.return_value = efetch_response(b'<PubmedArticleSet/>')
+        result = fetch_article_details(["1", "2"], use_cache=False)
+
+        assert result == b'<PubmedArticleSet/>'
+        assert mock_get.call_count == 2
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_does_not_cache_invalid_responses(self, mock_get, efetch_response):
+        """Test error pages, empty sets and truncated XML are not cached."""
+        for body in (b'<eFetchResult><ERROR>Empty id list</ERROR></eFetchResult>',
+                     b'<PubmedArticleSet></PubmedArticleSet>',
+                     b'<PubmedArticleSet><PubmedArticle>'):
+            mock_get.reset_mock()
+            mock_get.return_value = efetch_response(body)
+
+            fetch_article_details(["1"])
+            assert fetch_article_details(["1"]) == body
+
+            assert mock_get.call_count == 2
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_refetches_expired_cache(self, mock_get, efetch_response, sample_pubmed_xml, isolated_cache):
+        """Test cache entries older than CACHE_MAX_AGE are fetched again."""
+        mock_get.return_value = efetch_response(sample_pubmed_xml)
+        fetch_article_details(["1"])
+
+        (cache_file,) = isolated_cache.iterdir()
+        stale = time.time() - CACHE_MAX_AGE - 1
+        os.utime(cache_file, (stale, stale))
+        fetch_article_details(["1"])
+
+        assert mock_get.call_count == 2
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_cache_eviction_race(self, mock_get, efetch_response, sample_pubmed_xml, monkeypatch, caplog):
+        """Test a cache file removed by another thread during eviction does not fail the write."""
+        vanished = Mock()
+        vanished.name = "vanished.xml"
+        vanished.stat.side_effect = FileNotFoundError("vanished.xml")
+        scandir = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda path: [vanished, *scandir(path)])
+        mock_get.return_value = efetch_response(sample_pubmed_xml)
+
+        fetch_article_details(["1"])
+        fetch_article_details(["1"])
+
+        assert mock_get.call_count == 1
+        assert "Could not write" not in caplog.text
     
 
     @patch('pubmed_scout.fetch.typer.Exit')
@@ -96,17 +179,155 @@ class TestFetchArticleDetails:
             fetch_article_details(["invalid", "not_a_number"])
         assert e.value.code == 1
 
-    @patch('pubmed_scout.fetch.requests.get')
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_sends_identification(self, mock_get, efetch_response, sample_pubmed_xml, monkeypatch):
+        """Test Efetch requests carry the tool name, email and the default API key."""
+        monkeypatch.setattr("pubmed_scout.fetch.API_KEY", "envkey")
+        monkeypatch.setattr("pubmed_scout.fetch.EMAIL", "me@example.org")
+        mock_get.return_value = efetch_response(sample_pubmed_xml)
+
+        fetch_article_details(["1"])
+        params = mock_get.call_args.kwargs["params"]
+        assert params["api_key"] == "envkey"
+        assert params["email"] == "me@example.org"
+        assert params["tool"] == "pubmed_scout"
+
+        fetch_article_details(["2"], api_key="secret")
+        assert mock_get.call_args.kwargs["params"]["api_key"] == "secret"
+
+    def test_api_key_defaults_to_environment(self, monkeypatch):
+        """Test the default API key and email are read from NCBI_API_KEY and NCBI_EMAIL."""
+        with monkeypatch.context() as m:
+            m.setenv("NCBI_API_KEY", "envkey")
+            m.setenv("NCBI_EMAIL", "me@example.org")
+            reloaded = importlib.reload(constants)
+            assert reloaded.API_KEY == "envkey"
+            assert reloaded.EMAIL == "me@example.org"
+        importlib.reload(constants)
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_error_does_not_leak_api_key(self, mock_get, capsys, caplog):
+        """Test the API key in a connection error message is not logged or printed."""
+        mock_get.side_effect = requests.exceptions.ConnectionError(
+            "HTTPSConnectionPool(host='eutils.ncbi.nlm.nih.gov', port=443): Max retries exceeded "
+            "with url: /entrez/eutils/efetch.fcgi?db=pubmed&id=1&api_key=SECRETKEY (Caused by timeout)"
+        )
+
+        with pytest.raises(typer.Exit):
+            fetch_article_details(["1"], api_key="SECRETKEY")
+
+        output = capsys.readouterr().out + caplog.text
+        assert "Max retries exceeded" in output
+        assert "SECRETKEY" not in output
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_filters_invalid_and_duplicate_pmids(self, mock_get, efetch_response):
+        """Test invalid PMIDs are dropped and duplicates requested once, in order."""
+        mock_get.return_value = efetch_response(b'<PubmedArticleSet></PubmedArticleSet>')
+
+        fetch_article_details(["222", "invalid", "111", "222", "", None])
+
+        assert mock_get.call_args.kwargs["params"]["id"] == "222,111"
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_fetch_rejects_non_ascii_digits(self, mock_get):
+        """Test PMIDs made of non-ASCII digits are treated as invalid."""
+        with pytest.raises(typer.Exit) as e:
+            fetch_article_details(["١٢٣", "²"])
+
+        assert e.value.exit_code == 1
+        mock_get.assert_not_called()
+
+    @patch('pubmed_scout.fetch._SESSION.get')
     @patch('pubmed_scout.fetch.typer.Exit')
-    def test_fetch_api_failure(self, mock_exit, mock_get):
+    def test_fetch_api_failure(self, mock_exit, mock_get, error_response):
         """Test API failure handling."""
-        mock_response = Mock()
-        mock_response.status_code = 404
-        mock_response.text = "Not Found"
-        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404 Not Found")
-        mock_get.return_value = mock_response
+        mock_get.return_value = error_response(404, "Not Found")
 
         with pytest.raises(SystemExit) as e:
             fetch_article_details(["40741182"])
 
-        assert e.value.code == 1
\ No newline at end of file
+        assert e.value.code == 1
+
+
+class TestFetchArticleBatches:
+    """Test cases for fetch_article_batches function."""
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_batches_preserve_order(self, mock_get, efetch_response):
+        """Test PMIDs are split into batches and responses are yielded in order."""
+        mock_get.side_effect = lambda url, **kwargs: efetch_response(kwargs["params"]["id"].encode())
+
+        pmids = [str(i) for i in range(1, 6)]
+        responses = list(fetch_article_batches(pmids, batch_size=2, concurrency=2))
+
+        assert responses == [b"1,2", b"3,4", b"5"]
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_batches_are_requested_as_consumed(self, mock_get, efetch_response):
+        """Test no more than concurrency batches are fetched ahead of the consumer."""
+        mock_get.side_effect = lambda url, **kwargs: efetch_response(kwargs["params"]["id"].encode())
+
+        pmids = [str(i) for i in range(1, 21)]
+        responses = fetch_article_batches(pmids, batch_size=2, concurrency=2)
+        assert next(responses) == b"1,2"
+        responses.close()
+
+        assert mock_get.call_count <= 3
+
+    @patch('pubmed_scout.fetch._SESSION.get')
+    def test_batches_skip_duplicates_across_batches(self, mock_get, efetch_response):
+        """Test a PMID repeated in a later batch is only fetched once."""
+        mock_get.side_effect = lambda url, **kwargs: efetch_response(kwargs["params"]["id"].encode())
+
+        responses = list(fetch_article_batches(["1", "2", "3", "1", "4"], batch_size=2, concurrency=2))
+
+        assert responses == [b"1,2", b"3,4"]
+
+
+class FakeClock:
+    """Stand-in for the time module that advances only when slept."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimit:
+    """Test cases for the NCBI request throttle."""
+
+    @pytest.mark.parametrize("api_key, interval", [(None, 1 / 3), ("KEY", 1 / 10)])
+    def test_requests_are_spaced(self, monkeypatch, api_key, interval):
+        """Test requests are spaced at 1/3 s without an API key and 1/10 s with one."""
+        clock = FakeClock()
+        monkeypatch.setattr("pubmed_scout.fetch.time", clock)
+        monkeypatch.setattr("pubmed_scout.fetch._last_request_time", 0.0)
+
+        sent = []
+        for _ in range(4):
+            _wait_for_rate_limit(api_key)
+            sent.append(clock.now)
+
+        assert sent[0] == 1000.0
+        assert [b - a for a, b in zip(sent, sent[1:])] == pytest.approx([interval] * 3)
+
+
+class TestSession:
+    """Test cases for the shared E-utilities session."""
+
+    def test_session_retries_server_errors(self):
+        """Test the pooled adapter retries throttling and server errors."""
+        adapter = _SESSION.get_adapter(BASE_URL)
+
+        assert adapter.max_retries.total == 3
+        assert {429, 500, 502, 503, 504} <= set(adapter.max_retries.status_forcelist)
+
+    def test_session_headers(self):
+        """Test compressed responses are requested and the client identifies its version."""
+        assert "gzip" in _SESSION.headers["Accept-Encoding"]
+        assert _SESSION.headers["User-Agent"] == f"pubmed_scout/{pubmed_scout.__version__}"
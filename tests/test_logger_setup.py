@@ -0,0 +1,45 @@
+import logging
+import sys
+from io import StringIO
+import pytest
+from pubmed_scout.logger_setup import setup_logging
+
+
+@pytest.fixture
+def restore_root_logger():
+    """Put the root logger's handlers and level back after the test."""
+    root_logger = logging.getLogger()
+    handlers, level = root_logger.handlers[:], root_logger.level
+    yield root_logger
+    root_logger.handlers[:] = handlers
+    root_logger.setLevel(level)
+
+
+class TestSetupLogging:
+    """Test cases for setup_logging function."""
+
+    def test_file_handler_reused(self, restore_root_logger):
+        """Test repeated calls reuse one file handler instead of opening the log again."""
+        setup_logging()
+        first = [h for h in restore_root_logger.handlers if isinstance(h, logging.FileHandler)]
+        setup_logging(debug=True)
+        second = [h for h in restore_root_logger.handlers if isinstance(h, logging.FileHandler)]
+
+        assert len(first) == len(second) == 1
+        assert first[0] is second[0]
+        assert len(restore_root_logger.handlers) == 2
+        assert restore_root_logger.level == logging.DEBUG
+
+    def test_console_follows_replaced_stderr(self, restore_root_logger, monkeypatch):
+        """Test records go to the current stderr after it was swapped and the old one closed."""
+        old_stderr, new_stderr = StringIO(), StringIO()
+        monkeypatch.setattr(sys, "stderr", old_stderr)
+        setup_logging()
+        old_stderr.close()
+
+        monkeypatch.setattr(sys, "stderr", new_stderr)
+        setup_logging()
+        logging.getLogger("pubmed_scout.test").info("after swap")
+
+        assert "after swap" in new_stderr.getvalue()
+        assert "Logging error" not in new_stderr.getvalue()
@@ -1,9 +1,13 @@
 import pytest
-from xml.etree import ElementTree as ET
+import typer
+from io import BytesIO
 from unittest.mock import patch, Mock
 from pubmed_scout.parse import (
     is_company_affiliation, 
     parse_fetch_response,
+    parse_fetch_stream,
+    extract_emails_from_text,
+    is_pubmed_article_set,
     EMAIL_PATTERN
 )
 
@@ -39,6 +43,23 @@ class TestIsCompanyAffiliation:
         assert is_company_affiliation("BIOTECH CORP") is True
         assert is_company_affiliation("pharma inc") is True
 
+    def test_keywords_match_inside_words(self):
+        """Test keywords match as substrings, e.g. "pharma" in "Pharmaceuticals"."""
+        assert is_company_affiliation("Novartis Pharmaceuticals, Basel") is True
+        assert is_company_affiliation("Acme Corporation, Boston") is True
+        assert is_company_affiliation("Biotechnology Research Group, Ltd.") is True
+
+    def test_repeated_affiliations_are_memoized(self):
+        """Test repeated affiliation strings are answered from the cache."""
+        is_company_affiliation.cache_clear()
+
+        for _ in range(3):
+            assert is_company_affiliation("Genentech Inc., South San Francisco") is True
+
+        info = is_company_affiliation.cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+
 
 class TestEmailPattern:
     """Test cases for email regex pattern."""
@@ -68,115 +89,191 @@ class TestEmailPattern:
             match = EMAIL_PATTERN.search(email)
             assert match is None
 
+    def test_overlong_local_part_not_matched(self):
+        """Test a local part over 64 characters is rejected rather than truncated."""
+        text = f"Acme Pharma Inc. {'a' * 70}@acme.com"
+
+        assert EMAIL_PATTERN.search(text) is None
+        assert EMAIL_PATTERN.search(f"{'a' * 64}@acme.com").group() == f"{'a' * 64}@acme.com"
+
+    def test_extract_emails_from_text(self):
+        """Test all emails are extracted in order of appearance."""
+        text = "Acme Pharma Inc. a@acme.com; b@acme.com, a@acme.com"
+
+        assert extract_emails_from_text(text) == ["a@acme.com", "b@acme.com", "a@acme.com"]
+        assert extract_emails_from_text("") == []
+
 
 class TestParseFetchResponse:
     """Test cases for parse_fetch_response function."""
     
-    def test_parse_valid_xml(self):
+    def test_parse_valid_xml(self, sample_pubmed_xml):
         """Test parsing valid XML response."""
-        xml_content = """
-        <PubmedArticleSet>
-            <PubmedArticle>
-                <MedlineCitation Status="Publisher" Owner="NLM">
-                <PMID Version="1">12345</PMID>
-                <DateRevised>
-                    <Year>2025</Year>
-                    <Month>07</Month>
-                    <Day>31</Day>
-                </DateRevised>
-                <Article PubModel="Print">
-                    <Journal>
-                    <ISSN IssnType="Print">1234-5678</ISSN>
-                    <JournalIssue CitedMedium="Print">
-                        <Volume>10</Volume>
-                        <Issue>3</Issue>
-                        <PubDate>
-                        <Year>2025</Year>
-                        <Month>Jul</Month>
-                        <Day>30</Day>
-                        </PubDate>
-                    </JournalIssue>
-                    <Title>Journal of Sample Research</Title>
-                    <ISOAbbreviation>J Sample Res</ISOAbbreviation>
-                    </Journal>
-                    <ArticleTitle>Sample Study on BioTech Innovations</ArticleTitle>
-                    <Abstract>
-                    <AbstractText Label="BACKGROUND" NlmCategory="BACKGROUND">
-                        This is a sample abstract for demonstrating PubMed EFetch XML output.
-                    </AbstractText>
-                    </Abstract>
-                    <AuthorList CompleteYN="Y">
-                    <Author ValidYN="Y">
-                        <LastName>Doe</LastName>
-                        <ForeName>John</ForeName>
-                        <Initials>J</Initials>
-                        <AffiliationInfo>
-                        <Affiliation>BioTech Corp, San Francisco, CA, USA. john@biotech.com.</Affiliation>
-                        </AffiliationInfo>
-                    </Author>
-                    </AuthorList>
-                    <Language>eng</Language>
-                    <PublicationTypeList>
-                    <PublicationType UI="D016428">Journal Article</PublicationType>
-                    </PublicationTypeList>
-                </Article>
-                <MedlineJournalInfo>
-                    <Country>United States</Country>
-                    <MedlineTA>J Sample Res</MedlineTA>
-                    <NlmUniqueID>1234567</NlmUniqueID>
-                    <ISSNLinking>1234-5678</ISSNLinking>
-                </MedlineJournalInfo>
-                </MedlineCitation>
-                <PubmedData>
-                <History>
-                    <PubMedPubDate PubStatus="received">
-                    <Year>2025</Year>
-                    <Month>05</Month>
-                    <Day>01</Day>
-                    </PubMedPubDate>
-                    <PubMedPubDate PubStatus="accepted">
-                    <Year>2025</Year>
-                    <Month>07</Month>
-                    <Day>15</Day>
-                    </PubMedPubDate>
-                    <PubMedPubDate PubStatus="entrez">
-                    <Year>2025</Year>
-                    <Month>07</Month>
-                    <Day>31</Day>
-                    </PubMedPubDate>
-                </History>
-                <PublicationStatus>ppublish</PublicationStatus>
-                <ArticleIdList>
-                    <ArticleId IdType="pubmed">12345</ArticleId>
-                    <ArticleId IdType="doi">10.1234/sample.2025.00123</ArticleId>
-                </ArticleIdList>
-                </PubmedData>
-            </PubmedArticle>
-        </PubmedArticleSet>
-        """
-        
-        root = ET.fromstring(xml_content)
-        articles = parse_fetch_response(root)
+        articles = parse_fetch_response(BytesIO(sample_pubmed_xml))
         
         assert len(articles) == 1
         article = articles[0]
         assert article["PubmedID"] == "12345"
         assert article["Title"] == "Sample Study on BioTech Innovations"
-        assert article["Publication Date"] == " 2025 Jul 30"
+        assert article["Publication Date"] == "2025 Jul 30"
         assert "John Doe" in article["Non-Academic Authors"]
         assert "BioTech Corp" in article["Company Affiliations"]
     
+    def test_parse_medline_date(self):
+        """Test free-text MedlineDate publication dates are kept."""
+        xml_content = b"""
+        <PubmedArticleSet>
+            <PubmedArticle>
+                <MedlineCitation>
+                    <PMID>333</PMID>
+                    <Article>
+                        <Journal>
+                            <JournalIssue>
+                                <PubDate><MedlineDate>2024 Jul-Aug</MedlineDate></PubDate>
+                            </JournalIssue>
+                        </Journal>
+                        <ArticleTitle>Bimonthly issue</ArticleTitle>
+                    </Article>
+                </MedlineCitation>
+            </PubmedArticle>
+        </PubmedArticleSet>
+        """
+
+        articles = parse_fetch_response(xml_content)
+
+        assert articles[0]["Publication Date"] == "2024 Jul-Aug"
+
+    def test_parse_inline_markup(self):
+        """Test titles and affiliations with inline markup are read as one text each."""
+        xml_content = b"""
+        <PubmedArticleSet>
+            <PubmedArticle>
+                <MedlineCitation>
+                    <PMID>444</PMID>
+                    <Article>
+                        <ArticleTitle><i>E. coli</i> growth in CO<sub>2</sub></ArticleTitle>
+                        <AuthorList>
+                            <Author>
+                                <LastName>Doe</LastName>
+                                <ForeName>Jane</ForeName>
+                                <AffiliationInfo>
+                                    <Affiliation>Department of Chemistry, <i>Foo</i> Pharma Inc. a@b.com</Affiliation>
+                                </AffiliationInfo>
+                            </Author>
+                            <Author>
+                                <LastName>Roe</LastName>
+                                <ForeName>Rick</ForeName>
+                                <AffiliationInfo>
+                                    <Affiliation><i>Foo</i> Pharma Inc., Basel</Affiliation>
+                                </AffiliationInfo>
+                            </Author>
+                        </AuthorList>
+                    </Article>
+                </MedlineCitation>
+            </PubmedArticle>
+        </PubmedArticleSet>
+        """
+
+        article = parse_fetch_response(xml_content)[0]
+
+        assert article["Title"] == "E. coli growth in CO2"
+        assert article["Non-Academic Authors"] == "Rick Roe"
+        assert article["Company Affiliations"] == "Foo Pharma Inc., Basel"
+        assert article["Corresponding Author Email"] == "NO-EMAIL"
+
     @patch('pubmed_scout.parse.typer.Exit')
     def test_parse_none_root(self, mock_exit):
-        """Test parsing with None root element."""
+        """Test parsing with None source."""
         parse_fetch_response(None)
         mock_exit.assert_called_once_with(1)
     
     def test_parse_empty_xml(self):
         """Test parsing empty XML."""
-        xml_content = "<PubmedArticleSet></PubmedArticleSet>"
-        root = ET.fromstring(xml_content)
+        xml_content = b"<PubmedArticleSet></PubmedArticleSet>"
         
-        articles = parse_fetch_response(root)
+        articles = parse_fetch_response(xml_content)
         
-        assert articles == []
\ No newline at end of file
+        assert articles == []
+
+
+class TestIsPubmedArticleSet:
+    """Test cases for is_pubmed_article_set function."""
+
+    def test_complete_article_set(self, sample_pubmed_xml):
+        """Test complete article sets are accepted, with or without prolog."""
+        prolog = (b'<?xml version="1.0" ?>\n'
+                  b'<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2025//EN" '
+                  b'"https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_250101.dtd">\n')
+
+        assert is_pubmed_article_set(sample_pubmed_xml) is True
+        assert is_pubmed_article_set(prolog + sample_pubmed_xml) is True
+
+    def test_incomplete_or_error_responses(self, sample_pubmed_xml):
+        """Test error documents, empty sets and truncated responses are rejected."""
+        assert is_pubmed_article_set(b'<eFetchResult><ERROR>Empty id list</ERROR></eFetchResult>') is False
+        assert is_pubmed_article_set(b'<PubmedArticleSet></PubmedArticleSet>') is False
+        assert is_pubmed_article_set(sample_pubmed_xml[:-40]) is False
+
+
+class TestParseFetchStream:
+    """Test cases for parse_fetch_stream function."""
+
+    def test_stream_yields_articles(self):
+        """Test articles are yielded one by one from a byte stream."""
+        xml_content = b"""
+        <PubmedArticleSet>
+            <PubmedArticle>
+                <MedlineCitation>
+                    <PMID>111</PMID>
+                    <Article>
+                        <ArticleTitle>First</ArticleTitle>
+                        <AuthorList>
+                            <Author>
+                                <LastName>Doe</LastName>
+                                <ForeName>Jane</ForeName>
+                                <AffiliationInfo>
+                                    <Affiliation>Acme Pharma Inc, Boston, USA. jane@acme.com</Affiliation>
+                                </AffiliationInfo>
+                            </Author>
+                        </AuthorList>
+                    </Article>
+                </MedlineCitation>
+            </PubmedArticle>
+            <PubmedArticle>
+                <MedlineCitation>
+                    <PMID>222</PMID>
+                    <Article>
+                        <ArticleTitle>Second</ArticleTitle>
+                    </Article>
+                </MedlineCitation>
+            </PubmedArticle>
+        </PubmedArticleSet>
+        """
+
+        articles = list(parse_fetch_stream(BytesIO(xml_content)))
+
+        assert [a["PubmedID"] for a in articles] == ["111", "222"]
+        assert articles[0]["Non-Academic Authors"] == "Jane Doe"
+        assert articles[0]["Corresponding Author Email"] == "jane@acme.com"
+        assert articles[1]["Corresponding Author Email"] == "NO-EMAIL"
+
+    def test_stream_malformed_xml(self):
+        """Test malformed XML raises Exit."""
+        with pytest.raises(typer.Exit) as e:
+            list(parse_fetch_stream(BytesIO(b"<PubmedArticleSet><PubmedArticle>")))
+        assert e.value.exit_code == 1
+
+    def test_stream_rejects_str_source(self):
+        """Test a str source raises Exit instead of being opened as a file name."""
+        with pytest.raises(typer.Exit) as e:
+            list(parse_fetch_stream("<PubmedArticleSet/>"))
+        assert e.value.exit_code == 1
+
+    def test_stream_read_error(self):
+        """Test errors reading the stream raise Exit."""
+        source = Mock()
+        source.read.side_effect = OSError("connection reset")
+
+        with pytest.raises(typer.Exit) as e:
+            list(parse_fetch_stream(source))
+        assert e.value.exit_code == 1